@@ -45,6 +45,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'laundry.middleware.HashingPoolBusyMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -100,6 +101,29 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing runs on a bounded worker pool (see laundry/hashing.py).
+# Requests beyond WORKERS + QUEUE_SIZE get a fast 503 instead of queueing.
+AUTHENTICATION_BACKENDS = [
+    'laundry.backends.PooledModelBackend',
+]
+
+PASSWORD_HASHERS = [
+    'laundry.hashing.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASHING = {
+    'WORKERS': 2,
+    'QUEUE_SIZE': 8,
+    'TIMEOUT_SECONDS': 10,
+    'RETRY_AFTER_SECONDS': 1,
+    'PBKDF2_ITERATIONS': None,
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -119,6 +143,24 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR/ 'static']
 TEMPLATES[0]['DIRS'] = [BASE_DIR/'templates']
 
+# Notification retention (see `python manage.py prune_notifications`)
+NOTIFICATION_RETENTION = {
+    'ARCHIVE_AFTER_DAYS': 30,
+    'PURGE_AFTER_DAYS': 365,
+    'BATCH_SIZE': 500,
+    'SLEEP_SECONDS': 0,
+}
+
+# Idempotency-Key support for order creation and notification sends
+# (expired keys: `python manage.py prune_idempotency_keys`)
+IDEMPOTENCY = {
+    'TTL_HOURS': 24,
+    'IN_PROGRESS_SECONDS': 60,
+    'WAIT_SECONDS': 10,
+    'POLL_INTERVAL_SECONDS': 0.05,
+    'BATCH_SIZE': 500,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,5 +1,111 @@
 from django.contrib import admin
-from .models import User, Order, Notification
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.functions import Substr
+from django.utils.functional import cached_property
+from .models import User, Order, Notification, ArchivedNotification
+
+
+# --------------------------
+# Large-Table Mode Helpers
+# --------------------------
+def estimate_row_count(model, using='default'):
+    """
+    Return the planner's row estimate for a table, or None when the
+    database has no cheap estimate (anything other than PostgreSQL).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been analyzed
+    if not row or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an exact COUNT(*) over the whole table.
+    Unfiltered changelists on large tables use the planner estimate; anything
+    else counts at most `count_limit` + 1 rows and sets `count_is_capped` when
+    the limit is hit. Numbered pages therefore stop after `count_limit` rows
+    (about 100 pages); asking for a later page is treated like any other
+    invalid changelist lookup.
+
+    The count only feeds the label and the page numbers: pages are always
+    sliced by `per_page`, so a stale, low estimate cannot cut a page short.
+    """
+    count_limit = 10000
+    count_is_capped = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            # Below the limit an exact (capped) count is cheap and cannot be stale
+            if estimate is not None and estimate >= self.count_limit:
+                return estimate
+        count = queryset.order_by().values('pk')[:self.count_limit + 1].count()
+        self.count_is_capped = count > self.count_limit
+        return count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList that pages forward with a primary-key cursor (`?id__lt=<last id>`)
+    instead of OFFSET while the default `-pk` ordering is in use. Sorting by a
+    column falls back to numbered pages, which only reach the first
+    `EstimatedCountPaginator.count_limit` rows; use filters or the date
+    hierarchy to narrow a sorted view beyond that.
+    """
+
+    def get_results(self, request):
+        super().get_results(request)
+        if not self.multi_page:
+            # ChangeList skips slicing when the count fits on one page; an
+            # estimate can be low, so keep the query bounded regardless
+            limit = self.list_max_show_all if self.show_all else self.list_per_page
+            self.result_list = self.result_list[:limit]
+        cursor_lookup = f"{self.lookup_opts.pk.attname}__lt"
+        self.count_is_capped = getattr(self.paginator, 'count_is_capped', False)
+        self.keyset_enabled = ORDER_VAR not in self.params and not self.show_all
+        self.keyset_next_url = None
+        self.keyset_first_url = None
+        if not self.keyset_enabled:
+            return
+
+        # Evaluate once here; the template reuses the cached rows
+        rows = list(self.result_list)
+        if len(rows) >= self.list_per_page:
+            self.keyset_next_url = self.get_query_string({cursor_lookup: rows[-1].pk})
+        if cursor_lookup in self.params:
+            self.keyset_first_url = self.get_query_string(remove=[cursor_lookup])
+
+
+class LargeTableAdminMixin:
+    """
+    Keeps changelist cost flat as the table grows: estimated counts,
+    no second full-table count, and keyset paging on `-pk`.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
 
 
 # --------------------------
@@ -17,15 +123,17 @@ class UserAdmin(admin.ModelAdmin):
 # Order Admin
 # --------------------------
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         'id', 'customer', 'service_type', 'status',
         'pickup_address', 'delivery_address', 'total_price',
         'created_at', 'updated_at'
     )
-    list_filter = ('service_type', 'status', 'created_at')
+    list_filter = ('service_type', 'status')
+    list_select_related = ('customer',)
+    date_hierarchy = 'created_at'
     search_fields = ('customer__username', 'pickup_address', 'delivery_address')
-    ordering = ('-created_at',)
+    autocomplete_fields = ('customer',)
     readonly_fields = ('created_at', 'updated_at')
 
 
@@ -33,9 +141,38 @@ class OrderAdmin(admin.ModelAdmin):
 # Notification Admin
 # --------------------------
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'message', 'is_read', 'timestamp')
-    list_filter = ('is_read', 'timestamp')
+class NotificationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'message_preview', 'is_read', 'timestamp')
+    list_filter = ('is_read',)
+    list_select_related = ('user',)
+    date_hierarchy = 'timestamp'
     search_fields = ('user__username', 'message')
-    ordering = ('-timestamp',)
+    autocomplete_fields = ('user',)
     readonly_fields = ('timestamp',)
+    message_preview_length = 80
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        opts = self.model._meta
+        match = request.resolver_match
+        if match and match.url_name == f"{opts.app_label}_{opts.model_name}_changelist":
+            # The list only needs the first few characters of each message
+            queryset = queryset.annotate(
+                message_preview=Substr('message', 1, self.message_preview_length)
+            ).defer('message')
+        return queryset
+
+    @admin.display(description='Message')
+    def message_preview(self, obj):
+        return obj.message_preview
+
+
+# --------------------------
+# Archived Notification Admin
+# --------------------------
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('notification_id', 'user', 'timestamp', 'archived_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    readonly_fields = ('notification_id', 'user', 'message', 'timestamp', 'archived_at')
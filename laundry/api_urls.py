@@ -1,14 +1,13 @@
 from django.urls import path
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView,
+    PooledTokenObtainPairView,
     OrderListCreateView,
     OrderDetailView,
     OrderStatusUpdateView,
     NotificationListView,
+    ArchivedNotificationListView,
     NotificationUpdateView,
     NotificationCreateView,
     NotificationSendView,
@@ -20,7 +19,7 @@ urlpatterns = [
     # Authentication
     # ------------------------------
     path('auth/register/', RegisterView.as_view(), name='register'),
-    path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('auth/token/', PooledTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
     # ------------------------------
@@ -34,6 +33,7 @@ urlpatterns = [
     # Notifications Management
     # ------------------------------
     path('notifications/', NotificationListView.as_view(), name='notification-list'),
+    path('notifications/archived/', ArchivedNotificationListView.as_view(), name='notification-archived-list'),
     path('notifications/<int:pk>/', NotificationUpdateView.as_view(), name='notification-update'),
     path('notifications/create/', NotificationCreateView.as_view(), name='notification-create'),
     path('notifications/send/', NotificationSendView.as_view(), name='notification-send'),
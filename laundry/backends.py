@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import HashingPoolBusy, check_password_pooled, hash_password
+
+UserModel = get_user_model()
+
+
+# -----------------------------
+#  Pooled Authentication Backend
+# -----------------------------
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that verifies passwords on the bounded hashing pool instead of
+    the request thread. Database access stays on the request thread; only the
+    PBKDF2 work is offloaded. Hashes produced by an outdated hasher or cost are
+    upgraded after a successful check, unless the pool is busy at that moment.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the hasher once anyway to keep timing close to the existing-user path
+            hash_password(password)
+            return
+
+        is_correct, must_update = check_password_pooled(password, user.password)
+        if not is_correct:
+            return
+        if must_update:
+            # Best effort: a busy pool must not turn a correct login into a failure
+            try:
+                user.password = hash_password(password)
+            except HashingPoolBusy:
+                pass
+            else:
+                user.save(update_fields=['password'])
+        if self.user_can_authenticate(user):
+            return user
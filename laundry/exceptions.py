@@ -0,0 +1,16 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .hashing import get_hashing_setting
+
+
+class AuthServiceBusy(APIException):
+    """API form of HashingPoolBusy; rendered by DRF as 503 with Retry-After."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Authentication service is busy, please retry shortly."
+    default_code = 'hashing_pool_busy'
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns `wait` into a Retry-After header
+        self.wait = get_hashing_setting('RETRY_AFTER_SECONDS')
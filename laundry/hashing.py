@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password, verify_password
+
+
+# -----------------------------
+#  Hashing Pool Defaults
+# -----------------------------
+DEFAULT_PASSWORD_HASHING = {
+    'WORKERS': 2,             # threads doing PBKDF2 (hashlib releases the GIL while hashing)
+    'QUEUE_SIZE': 8,          # jobs allowed to wait for a free worker before we reject
+    'TIMEOUT_SECONDS': 10,    # longest a request waits for its hash result
+    'RETRY_AFTER_SECONDS': 1,
+    'PBKDF2_ITERATIONS': None,  # None keeps Django's default cost
+}
+
+
+def get_hashing_setting(name):
+    """Read a hashing option from settings.PASSWORD_HASHING, falling back to the defaults."""
+    overrides = getattr(settings, 'PASSWORD_HASHING', {})
+    return overrides.get(name, DEFAULT_PASSWORD_HASHING[name])
+
+
+class HashingPoolBusy(Exception):
+    """
+    Raised when the hashing pool is saturated. API views turn it into a 503
+    (see laundry.exceptions.AuthServiceBusy); HashingPoolBusyMiddleware does
+    the same for everything else, such as the admin login.
+    """
+
+
+# -----------------------------
+#  Configurable PBKDF2 Hasher
+# -----------------------------
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the work factor taken from PASSWORD_HASHING['PBKDF2_ITERATIONS'].
+    Keeps the 'pbkdf2_sha256' algorithm name so existing hashes still verify;
+    hashes stored at a different cost are re-encoded on the next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return get_hashing_setting('PBKDF2_ITERATIONS') or PBKDF2PasswordHasher.iterations
+
+
+# -----------------------------
+#  Bounded Worker Pool
+# -----------------------------
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _get_pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = get_hashing_setting('WORKERS')
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+            _slots = threading.BoundedSemaphore(workers + get_hashing_setting('QUEUE_SIZE'))
+    return _executor, _slots
+
+
+def shutdown_hashing_pool(wait=True):
+    """Stop the pool; the next hashing call builds a new one from the current settings."""
+    global _executor, _slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+        _executor = None
+        _slots = None
+
+
+def run_in_hashing_pool(func, *args):
+    """
+    Run `func(*args)` on the hashing pool and wait for the result.
+    Fails fast with HashingPoolBusy when every worker and queue slot is taken.
+    """
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingPoolBusy()
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=get_hashing_setting('TIMEOUT_SECONDS'))
+    except FutureTimeoutError:
+        future.cancel()
+        raise HashingPoolBusy()
+
+
+def hash_password(raw_password):
+    """Hash a password with the preferred hasher, off the request thread."""
+    return run_in_hashing_pool(make_password, raw_password)
+
+
+def check_password_pooled(raw_password, encoded):
+    """Return (is_correct, must_update) for a stored hash, off the request thread."""
+    return run_in_hashing_pool(verify_password, raw_password, encoded)
@@ -0,0 +1,254 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+# -----------------------------
+#  Idempotency Defaults
+# -----------------------------
+DEFAULT_IDEMPOTENCY = {
+    'TTL_HOURS': 24,              # how long a completed response can be replayed
+    'IN_PROGRESS_SECONDS': 60,    # lease on a key; renewed while the holder runs, so only a dead holder loses it
+    'WAIT_SECONDS': 10,           # how long a concurrent duplicate waits for the first request
+    'POLL_INTERVAL_SECONDS': 0.05,
+    'BATCH_SIZE': 500,            # rows deleted per statement when pruning expired keys
+}
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def get_idempotency_setting(name):
+    """Read an idempotency option from settings.IDEMPOTENCY, falling back to the defaults."""
+    overrides = getattr(settings, 'IDEMPOTENCY', {})
+    return overrides.get(name, DEFAULT_IDEMPOTENCY[name])
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed."
+    default_code = 'idempotency_key_in_progress'
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns `wait` into a Retry-After header
+        self.wait = 1
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request."
+    default_code = 'idempotency_key_mismatch'
+
+
+def _request_hash(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    fingerprint = f"{request.method}\n{request.path}\n{payload}"
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+
+def _replay(record):
+    return Response(
+        record.response_body,
+        status=record.response_status,
+        headers={REPLAYED_HEADER: 'true'},
+    )
+
+
+def _lease_expiry():
+    return timezone.now() + timedelta(seconds=get_idempotency_setting('IN_PROGRESS_SECONDS'))
+
+
+def _claim_key(request, key, request_hash):
+    """
+    Return (record, owned). `owned` is True when this request holds the key
+    (its `lock_token` is on the row) and must run the view; otherwise `record`
+    is a completed entry to replay. Concurrent duplicates poll until the
+    holder finishes. A key is only taken over once its lease has expired,
+    and only through a conditional update, so one request holds it at a time
+    and a request that lost it can no longer complete it.
+    """
+    deadline = time.monotonic() + get_idempotency_setting('WAIT_SECONDS')
+    while True:
+        now = timezone.now()
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+
+        if record is None:
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        request_hash=request_hash,
+                        lock_token=uuid.uuid4().hex,
+                        expires_at=_lease_expiry(),
+                    )
+                return record, True
+            except IntegrityError:
+                # Another request claimed the key first; look again
+                continue
+
+        if record.expires_at <= now:
+            # Replay window over, or the holder stopped renewing its lease
+            lock_token = uuid.uuid4().hex
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk, lock_token=record.lock_token, expires_at__lte=now
+            ).update(
+                status='in_progress',
+                request_hash=request_hash,
+                lock_token=lock_token,
+                response_status=None,
+                response_body=None,
+                expires_at=_lease_expiry(),
+            )
+            if taken:
+                record.refresh_from_db()
+                return record, True
+            continue
+
+        if record.request_hash != request_hash:
+            raise IdempotencyKeyMismatch()
+        if record.status == 'completed':
+            return record, False
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInProgress()
+        time.sleep(get_idempotency_setting('POLL_INTERVAL_SECONDS'))
+
+
+class _Heartbeat(threading.Thread):
+    """Keeps extending the holder's lease while the view runs."""
+
+    def __init__(self, record):
+        super().__init__(daemon=True)
+        self.record = record
+        self.stopped = threading.Event()
+
+    def run(self):
+        interval = get_idempotency_setting('IN_PROGRESS_SECONDS') / 3
+        try:
+            while not self.stopped.wait(interval):
+                try:
+                    IdempotencyKey.objects.filter(
+                        pk=self.record.pk, lock_token=self.record.lock_token, status='in_progress'
+                    ).update(expires_at=_lease_expiry())
+                except DatabaseError:
+                    # Renewal is best effort; the next tick tries again
+                    pass
+        finally:
+            connection.close()
+
+    def stop(self):
+        # Not joined: a renewal may be waiting on a row lock held by an enclosing transaction
+        self.stopped.set()
+
+
+class _Discard(Exception):
+    """Raised inside the transaction to roll back the view's writes."""
+
+
+def _run_as_owner(record, view_method, view, request, args, kwargs):
+    """
+    Run the view and mark the key completed in one transaction.
+    Returns the response, or None when the key was taken over meanwhile
+    (the view's writes are rolled back and the caller replays the new holder's result).
+    """
+    owned = IdempotencyKey.objects.filter(pk=record.pk, lock_token=record.lock_token, status='in_progress')
+    heartbeat = _Heartbeat(record)
+    heartbeat.start()
+    try:
+        try:
+            with transaction.atomic():
+                response = view_method(view, request, *args, **kwargs)
+                if response.status_code >= 500:
+                    raise _Discard()
+                completed = owned.update(
+                    status='completed',
+                    response_status=response.status_code,
+                    response_body=response.data,
+                    expires_at=timezone.now() + timedelta(hours=get_idempotency_setting('TTL_HOURS')),
+                )
+                if not completed:
+                    raise _Discard()
+                return response
+        except _Discard:
+            pass
+        except BaseException:
+            owned.delete()
+            raise
+    finally:
+        heartbeat.stop()
+
+    if response.status_code >= 500:
+        # Nothing was committed, so the key can be released for a retry
+        owned.delete()
+        return response
+    return None
+
+
+# -----------------------------
+#  View Decorator
+# -----------------------------
+def idempotent(view_method):
+    """
+    Make a DRF POST handler honour the `Idempotency-Key` header.
+
+    The first request with a key runs the handler and stores its response in
+    the same transaction as the handler's writes; later requests with the same
+    key and payload get that response back (marked with `Idempotent-Replayed: true`)
+    without running the handler. Raised exceptions and server errors roll the
+    writes back and release the key, so the client may retry them.
+    Requests without the header are handled as before.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            raise ValidationError({IDEMPOTENCY_HEADER: "Key must be at most 255 characters."})
+
+        request_hash = _request_hash(request)
+        while True:
+            record, owned = _claim_key(request, key, request_hash)
+            if not owned:
+                return _replay(record)
+            response = _run_as_owner(record, view_method, self, request, args, kwargs)
+            if response is not None:
+                return response
+            # Lost the key to another request; wait for its result and replay it
+
+    return wrapper
+
+
+# -----------------------------
+#  Eviction
+# -----------------------------
+def purge_expired_keys(batch_size=None):
+    """Delete expired idempotency keys in bounded batches. Returns the number of rows deleted."""
+    batch_size = batch_size or get_idempotency_setting('BATCH_SIZE')
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).order_by('pk')
+
+    total = 0
+    while True:
+        pks = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        IdempotencyKey.objects.filter(pk__in=pks).delete()
+        total += len(pks)
+        if len(pks) < batch_size:
+            break
+    return total
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+
+from laundry.retention import (
+    archive_read_notifications,
+    purge_archived_notifications,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive read notifications older than the retention window and purge expired archives. "
+        "Work is done in small batches; the command is safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive-after-days', type=int, default=None,
+                            help="Archive read notifications older than this many days.")
+        parser.add_argument('--purge-after-days', type=int, default=None,
+                            help="Delete archived notifications archived more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Rows handled per transaction.")
+        parser.add_argument('--sleep', type=float, default=None,
+                            help="Seconds to pause between batches (throttling).")
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help="Stop after this many batches per phase; re-run to continue.")
+        parser.add_argument('--start-after', type=int, default=0,
+                            help="Resume archiving after this notification id (printed by a previous run).")
+        parser.add_argument('--skip-archive', action='store_true', help="Only run the purge phase.")
+        parser.add_argument('--skip-purge', action='store_true', help="Only run the archive phase.")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be done without writing.")
+
+    def handle(self, *args, **options):
+        verbose = options['verbosity'] > 1
+        prefix = "[dry run] " if options['dry_run'] else ""
+
+        def report(phase):
+            def on_batch(count, last_pk):
+                if verbose:
+                    self.stdout.write(f"{prefix}{phase}: {count} row(s), last id {last_pk}")
+            return on_batch
+
+        if not options['skip_archive']:
+            archived, last_pk = archive_read_notifications(
+                older_than_days=options['archive_after_days'],
+                batch_size=options['batch_size'],
+                sleep_seconds=options['sleep'],
+                max_batches=options['max_batches'],
+                start_after=options['start_after'],
+                dry_run=options['dry_run'],
+                on_batch=report("archive"),
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefix}Archived {archived} notification(s); resume with --start-after {last_pk}."
+            ))
+
+        if not options['skip_purge']:
+            purged = purge_archived_notifications(
+                older_than_days=options['purge_after_days'],
+                batch_size=options['batch_size'],
+                sleep_seconds=options['sleep'],
+                max_batches=options['max_batches'],
+                dry_run=options['dry_run'],
+                on_batch=report("purge"),
+            )
+            self.stdout.write(self.style.SUCCESS(f"{prefix}Purged {purged} archived notification(s)."))
@@ -0,0 +1,27 @@
+from django.http import HttpResponse
+
+from .hashing import HashingPoolBusy, get_hashing_setting
+
+
+class HashingPoolBusyMiddleware:
+    """
+    Answer 503 with Retry-After when a non-API view (e.g. the admin login)
+    hits a saturated hashing pool, instead of failing with a 500.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, HashingPoolBusy):
+            return None
+        response = HttpResponse(
+            "Authentication service is busy, please retry shortly.",
+            status=503,
+            content_type='text/plain',
+        )
+        response['Retry-After'] = str(get_hashing_setting('RETRY_AFTER_SECONDS'))
+        return response
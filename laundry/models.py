@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 
 # Custom User model
 class User(AbstractUser):
@@ -40,6 +41,13 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Serve admin date-hierarchy navigation and the status filter
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} - {self.customer.username}"
 
@@ -51,5 +59,66 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves NotificationListView (per-user, latest first)
+            models.Index(fields=['user', '-timestamp'], name='notif_user_ts_idx'),
+            # Serves the retention sweep (read notifications older than N days)
+            models.Index(fields=['is_read', 'timestamp'], name='notif_read_ts_idx'),
+            # Serves admin date-hierarchy navigation
+            models.Index(fields=['timestamp'], name='notif_ts_idx'),
+        ]
+
     def __str__(self):
         return f"Notification for {self.user.username}"
+
+
+# Archived notification model (read notifications moved out of the hot table)
+class ArchivedNotification(models.Model):
+    # Primary key of the original Notification row; unique so a resumed
+    # archive run never copies the same row twice.
+    notification_id = models.BigIntegerField(unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_notifications')
+    message = models.TextField()
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='archnotif_user_ts_idx'),
+            models.Index(fields=['archived_at'], name='archnotif_archived_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived notification for {self.user.username}"
+
+
+# Idempotency key model (stored responses for retried POST requests)
+class IdempotencyKey(models.Model):
+    STATUS_CHOICES = [
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    # SHA-256 of method, path and payload; a reused key with a different request is rejected
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    # Identifies the request currently holding the key; every owner write is conditional on it
+    lock_token = models.CharField(max_length=32, blank=True, default='')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"Idempotency key {self.key} for {self.user.username}"
@@ -0,0 +1,137 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, ArchivedNotification
+
+
+# -----------------------------
+#  Retention Policy Defaults
+# -----------------------------
+DEFAULT_RETENTION = {
+    'ARCHIVE_AFTER_DAYS': 30,   # read notifications older than this leave the hot table
+    'PURGE_AFTER_DAYS': 365,    # archived notifications older than this are deleted
+    'BATCH_SIZE': 500,          # rows moved per transaction
+    'SLEEP_SECONDS': 0,         # pause between batches to throttle the sweep
+}
+
+
+def get_retention_setting(name):
+    """Read a retention option from settings.NOTIFICATION_RETENTION, falling back to the defaults."""
+    overrides = getattr(settings, 'NOTIFICATION_RETENTION', {})
+    return overrides.get(name, DEFAULT_RETENTION[name])
+
+
+# -----------------------------
+#  Archive: hot table -> archive table
+# -----------------------------
+def archive_read_notifications(older_than_days=None, batch_size=None, sleep_seconds=None,
+                               max_batches=None, start_after=0, dry_run=False, on_batch=None):
+    """
+    Move read notifications older than `older_than_days` into ArchivedNotification.
+
+    Rows are walked in primary-key order and each batch is copied and deleted
+    in its own short transaction, so locks are held only for one batch at a time.
+    The batch is read with SELECT ... FOR UPDATE SKIP LOCKED where the database
+    supports it, and the delete re-applies the policy, so a row edited after the
+    read is left in the hot table rather than archived with stale content.
+    A run can be stopped at any point and resumed (optionally from `start_after`);
+    rows already archived are skipped by the unique notification_id.
+
+    Returns a tuple of (rows archived, last primary key processed).
+    """
+    older_than_days = get_retention_setting('ARCHIVE_AFTER_DAYS') if older_than_days is None else older_than_days
+    batch_size = batch_size or get_retention_setting('BATCH_SIZE')
+    sleep_seconds = get_retention_setting('SLEEP_SECONDS') if sleep_seconds is None else sleep_seconds
+
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    candidates = Notification.objects.filter(is_read=True, timestamp__lt=cutoff).order_by('pk')
+
+    total = 0
+    last_pk = start_after
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            pending = candidates.filter(pk__gt=last_pk)
+            if not dry_run:
+                # Lock the batch; rows another transaction holds are left for a later run
+                pending = pending.select_for_update(skip_locked=True)
+            batch = list(pending.values('pk', 'user_id', 'message', 'timestamp')[:batch_size])
+            if not batch:
+                break
+
+            pks = [row['pk'] for row in batch]
+            kept = set()
+            if not dry_run:
+                # Re-check the policy in the delete, and only archive what it removed,
+                # so a row changed since the read (where rows cannot be locked) stays hot
+                candidates.filter(pk__in=pks).delete()
+                kept = set(Notification.objects.filter(pk__in=pks).values_list('pk', flat=True))
+                ArchivedNotification.objects.bulk_create(
+                    [
+                        ArchivedNotification(
+                            notification_id=row['pk'],
+                            user_id=row['user_id'],
+                            message=row['message'],
+                            timestamp=row['timestamp'],
+                        )
+                        for row in batch
+                        if row['pk'] not in kept
+                    ],
+                    ignore_conflicts=True,
+                )
+
+        total += len(batch) - len(kept)
+        last_pk = pks[-1]
+        batches += 1
+        if on_batch:
+            on_batch(len(batch) - len(kept), last_pk)
+        if len(batch) < batch_size:
+            break
+        if sleep_seconds:
+            time.sleep(sleep_seconds)
+
+    return total, last_pk
+
+
+# -----------------------------
+#  Purge: delete expired archive rows
+# -----------------------------
+def purge_archived_notifications(older_than_days=None, batch_size=None, sleep_seconds=None,
+                                 max_batches=None, dry_run=False, on_batch=None):
+    """
+    Delete archived notifications archived more than `older_than_days` ago, in bounded batches.
+    Returns the number of rows purged.
+    """
+    older_than_days = get_retention_setting('PURGE_AFTER_DAYS') if older_than_days is None else older_than_days
+    batch_size = batch_size or get_retention_setting('BATCH_SIZE')
+    sleep_seconds = get_retention_setting('SLEEP_SECONDS') if sleep_seconds is None else sleep_seconds
+
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    expired = ArchivedNotification.objects.filter(archived_at__lt=cutoff).order_by('pk')
+
+    total = 0
+    last_pk = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        pks = list(expired.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+
+        if not dry_run:
+            ArchivedNotification.objects.filter(pk__in=pks).delete()
+
+        total += len(pks)
+        last_pk = pks[-1]
+        batches += 1
+        if on_batch:
+            on_batch(len(pks), last_pk)
+        if len(pks) < batch_size:
+            break
+        if sleep_seconds:
+            time.sleep(sleep_seconds)
+
+    return total
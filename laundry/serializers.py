@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import User, Order, Notification
+from .exceptions import AuthServiceBusy
+from .hashing import HashingPoolBusy, hash_password
+from .models import User, Order, Notification, ArchivedNotification
 
 
 # -----------------------------
@@ -14,14 +16,18 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'password', 'role', 'phone_number']
 
     def create(self, validated_data):
-        """Create a new user with a hashed password"""
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data.get('email', ''),
-            password=validated_data['password'],
+        """Create a new user, hashing the password on the bounded hashing pool"""
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data.get('email', '')),
             role=validated_data.get('role', 'customer'),
             phone_number=validated_data.get('phone_number', '')
         )
+        try:
+            user.password = hash_password(validated_data['password'])
+        except HashingPoolBusy:
+            raise AuthServiceBusy()
+        user.save()
         return user
 
 
@@ -34,7 +40,10 @@ class LoginSerializer(serializers.Serializer):
 
     def validate(self, data):
         """Authenticate user credentials"""
-        user = authenticate(username=data['username'], password=data['password'])
+        try:
+            user = authenticate(username=data['username'], password=data['password'])
+        except HashingPoolBusy:
+            raise AuthServiceBusy()
         if not user:
             raise serializers.ValidationError("Invalid username or password.")
         return user
@@ -106,3 +115,21 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['user', 'message']
+
+
+# -----------------------------
+#  Archived Notification Serializer (read-only)
+# -----------------------------
+class ArchivedNotificationSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='notification_id', read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+    is_read = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedNotification
+        fields = ['id', 'username', 'message', 'is_read', 'timestamp', 'archived_at']
+        read_only_fields = fields
+
+    def get_is_read(self, obj):
+        """Only read notifications are archived"""
+        return True
@@ -1,3 +1,697 @@
-from django.test import TestCase
+import os
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import (
+    APIClient, APIRequestFactory, APITestCase, APITransactionTestCase, force_authenticate,
+)
+from rest_framework.views import APIView
+
+from .admin import EstimatedCountPaginator
+from .hashing import HashingPoolBusy, run_in_hashing_pool, shutdown_hashing_pool
+from .idempotency import idempotent
+from .models import User, Order, Notification, ArchivedNotification, IdempotencyKey
+from .retention import archive_read_notifications, purge_archived_notifications
+
+
+# -----------------------------
+#  Notification Retention
+# -----------------------------
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+
+    def make_notifications(self, count, days_old, is_read=True):
+        notifications = Notification.objects.bulk_create(
+            [Notification(user=self.user, message=f"message {i}", is_read=is_read) for i in range(count)]
+        )
+        # timestamp is auto_now_add, so backdate with an update
+        Notification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+            timestamp=timezone.now() - timedelta(days=days_old)
+        )
+        return notifications
+
+    def archive(self, days_old, count=1):
+        start = ArchivedNotification.objects.count()
+        archived = [
+            ArchivedNotification(notification_id=10000 + start + i, user=self.user, message="old", timestamp=timezone.now())
+            for i in range(count)
+        ]
+        archived = ArchivedNotification.objects.bulk_create(archived)
+        ArchivedNotification.objects.filter(pk__in=[a.pk for a in archived]).update(
+            archived_at=timezone.now() - timedelta(days=days_old)
+        )
+
+    def test_archives_only_old_read_notifications(self):
+        old_read = self.make_notifications(3, days_old=40)
+        self.make_notifications(2, days_old=40, is_read=False)
+        self.make_notifications(2, days_old=5)
+
+        archived, last_pk = archive_read_notifications(older_than_days=30, batch_size=2)
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(last_pk, old_read[-1].pk)
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertEqual(
+            sorted(ArchivedNotification.objects.values_list('notification_id', flat=True)),
+            [n.pk for n in old_read],
+        )
+        archive = ArchivedNotification.objects.get(notification_id=old_read[0].pk)
+        self.assertEqual(archive.message, "message 0")
+        self.assertEqual(archive.user, self.user)
+
+    def test_batches_are_reported(self):
+        self.make_notifications(5, days_old=40)
+        batches = []
+
+        archive_read_notifications(older_than_days=30, batch_size=2, on_batch=lambda n, pk: batches.append(n))
+
+        self.assertEqual(batches, [2, 2, 1])
+
+    def test_max_batches_then_resume(self):
+        notifications = self.make_notifications(5, days_old=40)
+
+        archived, last_pk = archive_read_notifications(older_than_days=30, batch_size=2, max_batches=1)
+        self.assertEqual(archived, 2)
+        self.assertEqual(last_pk, notifications[1].pk)
+        self.assertEqual(Notification.objects.count(), 3)
+
+        archived, last_pk = archive_read_notifications(older_than_days=30, batch_size=2, start_after=last_pk)
+        self.assertEqual(archived, 3)
+        self.assertEqual(last_pk, notifications[-1].pk)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(ArchivedNotification.objects.count(), 5)
+
+    def test_rerun_skips_rows_already_archived(self):
+        notification = self.make_notifications(1, days_old=40)[0]
+        ArchivedNotification.objects.create(
+            notification_id=notification.pk, user=self.user, message="copied earlier", timestamp=notification.timestamp
+        )
+
+        archived, _ = archive_read_notifications(older_than_days=30)
+
+        self.assertEqual(archived, 1)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(ArchivedNotification.objects.get().message, "copied earlier")
+
+    def test_row_changed_after_read_stays_hot(self):
+        notifications = self.make_notifications(3, days_old=40)
+        edited = notifications[1]
+        original_delete = QuerySet.delete
+
+        def edit_then_delete(queryset):
+            # Another request marks the notification unread between the batch read and the delete
+            Notification.objects.filter(pk=edited.pk).update(is_read=False, message="edited")
+            return original_delete(queryset)
+
+        with mock.patch.object(QuerySet, 'delete', edit_then_delete):
+            archived, _ = archive_read_notifications(older_than_days=30)
+
+        self.assertEqual(archived, 2)
+        self.assertEqual(Notification.objects.get().message, "edited")
+        self.assertFalse(ArchivedNotification.objects.filter(notification_id=edited.pk).exists())
+        self.assertEqual(ArchivedNotification.objects.count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        self.make_notifications(3, days_old=40)
+        self.archive(days_old=400)
+
+        archived, _ = archive_read_notifications(older_than_days=30, dry_run=True)
+        purged = purge_archived_notifications(older_than_days=365, dry_run=True)
+
+        self.assertEqual((archived, purged), (3, 1))
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(ArchivedNotification.objects.count(), 1)
+
+    def test_purge_respects_cutoff(self):
+        self.archive(days_old=400, count=3)
+        self.archive(days_old=100, count=2)
+
+        purged = purge_archived_notifications(older_than_days=365, batch_size=2)
+
+        self.assertEqual(purged, 3)
+        self.assertEqual(ArchivedNotification.objects.count(), 2)
+
+    def test_command_max_batches_and_start_after(self):
+        notifications = self.make_notifications(4, days_old=40)
+        out = StringIO()
+
+        call_command(
+            'prune_notifications', archive_after_days=30, batch_size=1, max_batches=2,
+            skip_purge=True, stdout=out,
+        )
+        self.assertIn(f"Archived 2 notification(s); resume with --start-after {notifications[1].pk}", out.getvalue())
+        self.assertEqual(Notification.objects.count(), 2)
+
+        call_command(
+            'prune_notifications', archive_after_days=30, batch_size=1,
+            start_after=notifications[1].pk, skip_purge=True, stdout=StringIO(),
+        )
+        self.assertFalse(Notification.objects.exists())
+
+    def test_command_dry_run_writes_nothing(self):
+        self.make_notifications(2, days_old=40)
+        self.archive(days_old=400)
+        out = StringIO()
+
+        call_command('prune_notifications', archive_after_days=30, purge_after_days=365, dry_run=True, stdout=out)
+
+        self.assertIn("[dry run] Archived 2", out.getvalue())
+        self.assertIn("[dry run] Purged 1", out.getvalue())
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(ArchivedNotification.objects.count(), 1)
+
+    def test_archived_endpoint_lists_own_items(self):
+        notification = self.make_notifications(1, days_old=40)[0]
+        other = User.objects.create_user(username='bob', password='secret123')
+        ArchivedNotification.objects.create(notification_id=99999, user=other, message="not mine", timestamp=timezone.now())
+        archive_read_notifications(older_than_days=30)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/notifications/archived/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()['results']], [notification.pk])
+
+    def test_archived_endpoint_is_paginated(self):
+        page_size = 50
+        now = timezone.now()
+        ArchivedNotification.objects.bulk_create([
+            ArchivedNotification(
+                notification_id=i, user=self.user, message=f"old {i}", timestamp=now - timedelta(minutes=i)
+            )
+            for i in range(page_size + 5)
+        ])
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        first = client.get('/api/notifications/archived/').json()
+        self.assertEqual(len(first['results']), page_size)
+        self.assertEqual([item['id'] for item in first['results']][:2], [0, 1])
+        self.assertIsNotNone(first['next'])
+
+        second = client.get(first['next']).json()
+        self.assertEqual([item['id'] for item in second['results']], list(range(page_size, page_size + 5)))
+        self.assertIsNone(second['next'])
+
+
+# -----------------------------
+#  Password Hashing Pool
+# -----------------------------
+FAST_HASHING = {
+    'WORKERS': 1,
+    'QUEUE_SIZE': 0,
+    'TIMEOUT_SECONDS': 5,
+    'RETRY_AFTER_SECONDS': 1,
+    'PBKDF2_ITERATIONS': 1000,
+}
+
+
+class HashingPoolTestMixin:
+    def setUp(self):
+        super().setUp()
+        # The pool is sized from settings when first used, so rebuild it per test
+        shutdown_hashing_pool()
+        self.addCleanup(shutdown_hashing_pool)
+
+    def occupy_pool(self):
+        """Block every worker (WORKERS=1, QUEUE_SIZE=0) until the returned event is set."""
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=run_in_hashing_pool, args=(block,))
+        thread.start()
+        started.wait(5)
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        return release
+
+
+@override_settings(PASSWORD_HASHING=FAST_HASHING)
+class HashingPoolTests(HashingPoolTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='secret123')
+        self.client_api = APIClient()
+
+    def test_token_and_register_work_when_pool_is_free(self):
+        response = self.client_api.post('/api/auth/token/', {'username': 'alice', 'password': 'secret123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+
+        response = self.client_api.post('/api/auth/register/', {'username': 'bob', 'password': 'secret123'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(username='bob').check_password('secret123'))
+
+    def test_wrong_password_is_rejected(self):
+        response = self.client_api.post('/api/auth/token/', {'username': 'alice', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_returns_503_when_pool_is_full(self):
+        self.occupy_pool()
+
+        response = self.client_api.post('/api/auth/token/', {'username': 'alice', 'password': 'secret123'}, format='json')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_register_returns_503_when_pool_is_full(self):
+        self.occupy_pool()
+
+        response = self.client_api.post('/api/auth/register/', {'username': 'bob', 'password': 'secret123'}, format='json')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(User.objects.filter(username='bob').exists())
+
+    def test_admin_login_returns_503_when_pool_is_full(self):
+        self.occupy_pool()
+
+        response = self.client.post('/admin/login/', {'username': 'alice', 'password': 'secret123'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_pool_raises_plain_exception(self):
+        self.occupy_pool()
+        with self.assertRaises(HashingPoolBusy):
+            run_in_hashing_pool(len, 'x')
+
+    def test_login_rehashes_when_iterations_change(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with self.settings(PASSWORD_HASHING={**FAST_HASHING, 'PBKDF2_ITERATIONS': 2000}):
+            response = self.client_api.post(
+                '/api/auth/token/', {'username': 'alice', 'password': 'secret123'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password('secret123'))
+
+    def test_login_succeeds_without_rehash_when_pool_is_busy(self):
+        old_hash = self.user.password
+
+        with self.settings(PASSWORD_HASHING={**FAST_HASHING, 'PBKDF2_ITERATIONS': 2000}), \
+                mock.patch('laundry.backends.hash_password', side_effect=HashingPoolBusy):
+            response = self.client_api.post(
+                '/api/auth/token/', {'username': 'alice', 'password': 'secret123'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, old_hash)
+
+
+@tag('load')
+@skipUnless(os.environ.get('RUN_LOAD_TESTS'), "set RUN_LOAD_TESTS=1 to run load tests")
+@override_settings(PASSWORD_HASHING={**FAST_HASHING, 'QUEUE_SIZE': 1, 'PBKDF2_ITERATIONS': 300000})
+class HashingPoolLoadTests(HashingPoolTestMixin, TransactionTestCase):
+    """
+    Saturates the token endpoint from several threads and checks that the
+    order list keeps roughly its unloaded latency. Timing based, so it only runs on request:
+    `RUN_LOAD_TESTS=1 python manage.py test laundry --tag=load`.
+    """
+    login_threads = 8
+    samples = 20
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='secret123')
+        Order.objects.bulk_create([
+            Order(customer=self.user, service_type='wash', pickup_address='a', delivery_address='b')
+            for _ in range(20)
+        ])
+
+    def order_list_latencies(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        latencies = []
+        for _ in range(self.samples):
+            started = time.perf_counter()
+            response = client.get('/api/orders/')
+            latencies.append(time.perf_counter() - started)
+            self.assertEqual(response.status_code, 200)
+        return latencies
+
+    def test_order_latency_stays_stable_while_logins_saturate_pool(self):
+        baseline = statistics.median(self.order_list_latencies())
+
+        stop = threading.Event()
+        codes = []
+
+        def hammer_logins():
+            client = APIClient()
+            while not stop.is_set():
+                response = client.post(
+                    '/api/auth/token/', {'username': 'alice', 'password': 'secret123'}, format='json'
+                )
+                codes.append(response.status_code)
+                if response.status_code == 503:
+                    time.sleep(0.01)
+
+        threads = [threading.Thread(target=hammer_logins) for _ in range(self.login_threads)]
+        for thread in threads:
+            thread.start()
+        try:
+            time.sleep(0.2)
+            loaded = statistics.median(self.order_list_latencies())
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        report = (
+            f"order list p50: {baseline * 1000:.1f} ms idle, {loaded * 1000:.1f} ms during login saturation; "
+            f"token responses: {codes.count(200)} x 200, {codes.count(503)} x 503"
+        )
+        self.assertIn(503, codes, report)
+        self.assertIn(200, codes, report)
+        # One hashing worker can take at most one core's share from the request thread
+        self.assertLess(loaded, baseline * 4 + 0.05, report)
+
+
+# -----------------------------
+#  Large-Table Admin
+# -----------------------------
+class LargeTableAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='root', password='secret123', email='root@example.com')
+        self.client.force_login(self.admin)
+        Order.objects.bulk_create([
+            Order(customer=self.admin, service_type='wash', pickup_address='a', delivery_address='b')
+            for _ in range(120)
+        ])
+        Notification.objects.bulk_create([Notification(user=self.admin, message='x' * 500) for _ in range(30)])
+
+    def test_notification_changelist_does_not_fetch_full_message(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/laundry/notification/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'x' * 80)
+        self.assertNotContains(response, 'x' * 81)
+        listing = [q['sql'] for q in queries.captured_queries if 'SUBSTR' in q['sql'].upper()]
+        self.assertEqual(len(listing), 1)
+        selected = listing[0].replace('SUBSTR("laundry_notification"."message"', 'SUBSTR(')
+        self.assertNotIn('"laundry_notification"."message"', selected)
+
+    def test_notification_change_form_keeps_full_message(self):
+        notification = Notification.objects.first()
+
+        response = self.client.get(f'/admin/laundry/notification/{notification.pk}/change/')
+
+        self.assertContains(response, 'x' * 500)
+
+    def test_keyset_links_page_through_orders(self):
+        orders = list(Order.objects.order_by('-pk'))
+
+        response = self.client.get('/admin/laundry/order/')
+        self.assertContains(response, f'?id__lt={orders[99].pk}')
+        self.assertContains(response, 'about 120')
+        self.assertNotContains(response, 'Newest')
+
+        response = self.client.get(f'/admin/laundry/order/?id__lt={orders[99].pk}')
+        self.assertEqual(list(response.context['cl'].result_list), orders[100:])
+        self.assertContains(response, 'Newest')
+        self.assertContains(response, 'about 20')
+        self.assertContains(response, 'older')
+        self.assertNotContains(response, 'Older')
+
+    def test_low_estimate_falls_back_to_capped_count(self):
+        with mock.patch('laundry.admin.estimate_row_count', return_value=5):
+            response = self.client.get('/admin/laundry/order/')
+
+        self.assertEqual(len(response.context['cl'].result_list), 100)
+        self.assertEqual(response.context['cl'].result_count, 120)
+        self.assertContains(response, '?id__lt=')
+
+    def test_stale_estimate_does_not_cut_pages_short(self):
+        # Estimate above the limit but below the real row count (and the page size)
+        EstimatedCountPaginator.count_limit = 50
+        self.addCleanup(setattr, EstimatedCountPaginator, 'count_limit', 10000)
+
+        with mock.patch('laundry.admin.estimate_row_count', return_value=60):
+            response = self.client.get('/admin/laundry/order/')
+
+        self.assertEqual(response.context['cl'].result_count, 60)
+        self.assertContains(response, 'about 60')
+        self.assertEqual(len(response.context['cl'].result_list), 100)
+        self.assertContains(response, '?id__lt=')
+
+    def test_date_hierarchy_uses_range_not_distinct_scan(self):
+        first = Order.objects.order_by('pk').first()
+        Order.objects.filter(pk=first.pk).update(created_at=timezone.make_aware(datetime(2024, 11, 3, 12)))
+        Order.objects.exclude(pk=first.pk).update(created_at=timezone.make_aware(datetime(2026, 2, 10, 12)))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/laundry/order/')
+
+        self.assertFalse([q['sql'] for q in queries.captured_queries if 'DISTINCT' in q['sql'].upper()])
+        for year in ('2024', '2025', '2026'):
+            self.assertContains(response, f'?created_at__year={year}"')
+
+        response = self.client.get('/admin/laundry/order/?created_at__year=2026')
+        self.assertContains(response, 'created_at__month=2')
+        self.assertNotContains(response, 'created_at__month=3')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/laundry/order/?created_at__year=2026&created_at__month=2')
+        self.assertFalse([q['sql'] for q in queries.captured_queries if 'DISTINCT' in q['sql'].upper()])
+        self.assertContains(response, 'created_at__day=10')
+        self.assertNotContains(response, 'created_at__day=11')
+
+    def test_sorted_view_uses_numbered_pages(self):
+        response = self.client.get('/admin/laundry/order/?o=1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['cl'].keyset_enabled)
+        self.assertContains(response, '?o=1&amp;p=2')
+
+    def test_capped_count_is_labelled(self):
+        EstimatedCountPaginator.count_limit = 50
+        self.addCleanup(setattr, EstimatedCountPaginator, 'count_limit', 10000)
+
+        response = self.client.get('/admin/laundry/order/?status__exact=pending&o=1')
+
+        self.assertTrue(response.context['cl'].count_is_capped)
+        self.assertContains(response, 'more than 50')
+        self.assertContains(response, 'pages cover the first 50')
+
+
+# -----------------------------
+#  Idempotency Keys
+# -----------------------------
+class SendOnceView(APIView):
+    """Test view: writes one notification, then answers with `reply_status`."""
+    reply_status = status.HTTP_201_CREATED
+    fail = False
+    on_run = None
+
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        if self.on_run:
+            self.on_run()
+        notification = Notification.objects.create(user=request.user, message=request.data['message'])
+        if self.fail:
+            raise RuntimeError("handler failed")
+        return Response({'id': notification.pk}, status=self.reply_status)
+
+
+@override_settings(IDEMPOTENCY={'WAIT_SECONDS': 0.2, 'POLL_INTERVAL_SECONDS': 0.01})
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='secret123', role='admin')
+        self.customer = User.objects.create_user(username='carol', password='secret123')
+        self.client.force_authenticate(self.customer)
+        self.order = {'service_type': 'wash', 'pickup_address': 'a', 'delivery_address': 'b'}
+
+    def post(self, url, data, key):
+        return self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def call_view(self, data, key, **view_options):
+        request = APIRequestFactory().post('/send-once/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=self.customer)
+        return SendOnceView.as_view(**view_options)(request)
+
+    def test_order_retry_replays_stored_response(self):
+        first = self.post('/api/orders/', self.order, 'order-1')
+        with CaptureQueriesContext(connection) as queries:
+            second = self.post('/api/orders/', self.order, 'order-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        writes = [q['sql'] for q in queries.captured_queries if not q['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        self.client.post('/api/orders/', self.order, format='json')
+        self.client.post('/api/orders/', self.order, format='json')
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_admin_broadcast_retry_fans_out_once(self):
+        self.client.force_authenticate(self.admin)
+        payload = {'message': 'Closed tomorrow', 'send_to_all': True}
+
+        first = self.post('/api/notifications/admin/send/', payload, 'broadcast-1')
+        second = self.post('/api/notifications/admin/send/', payload, 'broadcast-1')
+
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(Notification.objects.filter(message='Closed tomorrow').count(), 1)
+
+    def test_key_reused_with_different_payload_returns_422(self):
+        self.post('/api/orders/', self.order, 'order-1')
+
+        response = self.post('/api/orders/', {**self.order, 'pickup_address': 'elsewhere'}, 'order-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_duplicate_waits_then_gets_409_while_first_is_running(self):
+        claimed = self.post('/api/orders/', self.order, 'order-1')
+        IdempotencyKey.objects.filter(key='order-1').update(
+            status='in_progress', lock_token='someone-else', expires_at=timezone.now() + timedelta(seconds=60)
+        )
+        started = time.monotonic()
+
+        response = self.post('/api/orders/', self.order, 'order-1')
+
+        self.assertEqual(claimed.status_code, 201)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_duplicate_waits_then_replays_when_first_completes(self):
+        first = self.post('/api/orders/', self.order, 'order-1')
+        record = IdempotencyKey.objects.get(key='order-1')
+        IdempotencyKey.objects.filter(pk=record.pk).update(status='in_progress', lock_token='someone-else')
+
+        def first_request_finishes(_):
+            IdempotencyKey.objects.filter(pk=record.pk).update(status='completed')
+
+        with mock.patch('laundry.idempotency.time.sleep', side_effect=first_request_finishes) as sleep:
+            response = self.post('/api/orders/', self.order, 'order-1')
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_server_error_rolls_back_and_releases_key(self):
+        response = self.call_view({'message': 'hello'}, 'send-1', reply_status=503)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.call_view({'message': 'hello'}, 'send-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_exception_rolls_back_and_releases_key(self):
+        with self.assertRaises(RuntimeError):
+            self.call_view({'message': 'hello'}, 'send-1', fail=True)
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_client_error_is_stored_and_replayed(self):
+        first = self.call_view({'message': 'hello'}, 'send-1', reply_status=400)
+        second = self.call_view({'message': 'hello'}, 'send-1', reply_status=400)
+
+        self.assertEqual((first.status_code, second.status_code), (400, 400))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_expired_completed_key_can_be_reused(self):
+        self.post('/api/orders/', self.order, 'order-1')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.post('/api/orders/', self.order, 'order-1')
+
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.get().status, 'completed')
+
+    def test_prune_command_deletes_only_expired_keys(self):
+        self.post('/api/orders/', self.order, 'keep')
+        self.post('/api/orders/', self.order, 'drop-1')
+        self.post('/api/orders/', self.order, 'drop-2')
+        IdempotencyKey.objects.filter(key__startswith='drop').update(expires_at=timezone.now() - timedelta(hours=1))
+        out = StringIO()
+
+        call_command('prune_idempotency_keys', batch_size=1, stdout=out)
+
+        self.assertIn("Purged 2 expired idempotency key(s).", out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['keep'])
+
+
+class IdempotencyTakeoverTests(APITransactionTestCase):
+    """
+    A retry takes over a key whose lease expired while the first request was
+    still running. Only one of them may commit its writes, and the first must
+    end up replaying the retry's response instead of failing.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='carol', password='secret123')
+
+    def send(self, on_run=None):
+        request = APIRequestFactory().post(
+            '/send-once/', {'message': 'hello'}, format='json', HTTP_IDEMPOTENCY_KEY='send-1'
+        )
+        force_authenticate(request, user=self.user)
+        return SendOnceView.as_view(on_run=on_run)(request)
+
+    def test_lease_expiry_during_first_request_commits_once(self):
+        retry_responses = []
+
+        def retry_after_lease_expires():
+            IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+            retry_responses.append(self.send())
+            connection.close()
+
+        def first_handler_runs():
+            # The first request's handler is still running when the retry arrives
+            if retry_responses:
+                return
+            retry = threading.Thread(target=retry_after_lease_expires)
+            retry.start()
+            retry.join()
+
+        first = self.send(on_run=first_handler_runs)
+
+        self.assertEqual(len(retry_responses), 1)
+        retry = retry_responses[0]
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first['Idempotent-Replayed'], 'true')
+        self.assertEqual(first.data, retry.data)
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().status, 'completed')
@@ -1,12 +1,18 @@
 from rest_framework import generics, permissions, status
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
-from .models import User, Order, Notification
+from rest_framework_simplejwt.views import TokenObtainPairView
+from .exceptions import AuthServiceBusy
+from .hashing import HashingPoolBusy
+from .idempotency import idempotent
+from .models import User, Order, Notification, ArchivedNotification
 from .serializers import (
     RegisterSerializer,
     OrderSerializer,
     OrderStatusUpdateSerializer,
     NotificationSerializer,
     NotificationCreateSerializer,
+    ArchivedNotificationSerializer,
 )
 
 # -----------------------------
@@ -21,6 +27,22 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 
+# -----------------------------
+#  JWT Token Obtain View
+# -----------------------------
+class PooledTokenObtainPairView(TokenObtainPairView):
+    """
+    SimpleJWT token view that answers 503 (with Retry-After) when the
+    password hashing pool is saturated.
+    """
+
+    def post(self, request, *args, **kwargs):
+        try:
+            return super().post(request, *args, **kwargs)
+        except HashingPoolBusy:
+            raise AuthServiceBusy()
+
+
 # -----------------------------
 #  Orders: List & Create
 # -----------------------------
@@ -38,6 +60,10 @@ class OrderListCreateView(generics.ListCreateAPIView):
             return Order.objects.all().order_by("-created_at")
         return Order.objects.filter(customer=user).order_by("-created_at")
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(customer=self.request.user)
 
@@ -82,6 +108,31 @@ class NotificationListView(generics.ListAPIView):
         return Notification.objects.filter(user=self.request.user).order_by("-timestamp")
 
 
+# -----------------------------
+#  Notifications: Archived (User)
+# -----------------------------
+class ArchivedNotificationPagination(CursorPagination):
+    """
+    Cursor pages in archnotif_user_ts_idx order, so each page is one bounded
+    index range scan however large the archive grows.
+    """
+    ordering = "-timestamp"
+    page_size = 50
+
+
+class ArchivedNotificationListView(generics.ListAPIView):
+    """
+    Returns the authenticated user's archived (read, expired) notifications.
+    Sorted by latest first, one cursor page at a time.
+    """
+    serializer_class = ArchivedNotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ArchivedNotificationPagination
+
+    def get_queryset(self):
+        return ArchivedNotification.objects.filter(user=self.request.user).select_related('user')
+
+
 # -----------------------------
 #  Notifications: Mark as Read
 # -----------------------------
@@ -134,6 +185,7 @@ class NotificationSendView(generics.CreateAPIView):
     serializer_class = NotificationCreateSerializer
     permission_classes = [permissions.IsAdminUser]
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -151,6 +203,7 @@ class AdminSendNotificationView(generics.CreateAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         # ✅ Ensure only admins can perform this
         if request.user.role != "admin":